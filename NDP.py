@@ -1,37 +1,197 @@
 #network diagnostic plotter
 import pandas as pd
+import numpy as np
+import sys
+import matplotlib
+# Saving to a file (-o/--output-file) never needs a GUI toolkit, so skip loading one
+# (covers '-o file', '-ofile' and argparse's abbreviations of '--output-file', with or without '=')
+if __name__ == "__main__" and any(arg.startswith(('-o', '--o')) for arg in sys.argv[1:]):
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import seaborn as sns
 import argparse
 import os
 from datetime import datetime, timedelta # Import timedelta
 
-def plot_network_diagnostics(csv_path, output_file=None, days_to_display=None): # Added days_to_display
+# --- Diagnostics log schema (also used by the orchestrator, NMO.py) ---
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S' # Format written by the PowerShell check script
+# Column types for the diagnostics log, applied by the CSV parser while reading
+CSV_DTYPES = {
+    'CheckType': 'category',
+    'CheckName': 'category',
+    'TargetHost': 'category',
+    'Details': 'string',
+}
+# Numeric columns are coerced after reading so a stray non-numeric cell becomes NaN instead of failing the read
+NUMERIC_COLUMNS = ['TargetPort', 'ResponseTimeMs']
+SUCCESS_TRUE_VALUES = ['True', 'true', 'yes', 'Yes']
+SUCCESS_FALSE_VALUES = ['False', 'false', 'no', 'No']
+# Minimal white-grid look, applied directly instead of loading seaborn's theme machinery
+PLOT_STYLE = {
+    'axes.grid': True,
+    'axes.facecolor': 'white',
+    'axes.edgecolor': '#cccccc',
+    'grid.color': '#dddddd',
+    'figure.facecolor': 'white',
+    'font.size': 10,
+}
+MAX_PLOT_POINTS = 5000 # Upper bound on points drawn per status plot (failures included)
+PING_RESAMPLE_RULE = '5min' # Averaging window for ping speed once it exceeds MAX_PLOT_POINTS
+
+def read_log(source):
+    """Reads the diagnostics log (a path or file-like object) with the column types applied by the parser."""
+    return pd.read_csv(source, parse_dates=['Timestamp'], date_format=TIMESTAMP_FORMAT,
+                       dtype=CSV_DTYPES, true_values=SUCCESS_TRUE_VALUES,
+                       false_values=SUCCESS_FALSE_VALUES, engine='c',
+                       memory_map=isinstance(source, (str, os.PathLike))) # Only real files can be mapped
+
+def normalize_log(df):
+    """
+    Coerces the columns read_log could not type on its own, in place.
+
+    Malformed timestamps become NaT, non-numeric TargetPort/ResponseTimeMs cells become NaN
+    and Success values that are not recognised as true count as failures (False).
+
+    Args:
+        df (pd.DataFrame): Log rows as returned by read_log.
+    Returns:
+        pd.DataFrame: df, with the columns converted.
+    """
+    # read_csv leaves Timestamp unparsed if any stamp is malformed
+    if not pd.api.types.is_datetime64_any_dtype(df['Timestamp']):
+        df['Timestamp'] = pd.to_datetime(df['Timestamp'], format=TIMESTAMP_FORMAT, cache=True, errors='coerce')
+
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float32')
+
+    # Match anything read_csv could not map to a bool as text
+    success = df['Success'].to_numpy()
+    if success.dtype != bool:
+        success = np.isin(np.char.lower(success.astype('U5')), np.array(['true', 'yes'], dtype='U5'))
+    df['Success'] = success.astype(bool, copy=False) # No copy when already bool
+    return df
+
+def category_code(categories, name):
+    """Integer code of `name` among a categorical's categories; -2 if absent, which matches no row (-1 is NaN)."""
+    return categories.get_loc(name) if name in categories else -2
+
+def evenly_spaced(positions, count):
+    """Picks `count` evenly spaced entries from a sorted array of row positions."""
+    if count >= len(positions):
+        return positions
+    return positions[np.linspace(0, len(positions) - 1, count).astype(np.int64)]
+
+def thin_positions(positions, budget, keep=None):
+    """
+    Picks at most `budget` evenly spaced row positions, favouring the rows flagged in `keep`.
+
+    Args:
+        positions (np.ndarray): Sorted row positions to choose from.
+        budget (int): Maximum number of positions to return.
+        keep (np.ndarray, optional): Boolean mask over all rows of the frame marking favoured rows
+            (e.g. failures). They are all kept if they fit, otherwise they get at least half the budget.
+    Returns:
+        np.ndarray: The chosen positions, sorted.
+    """
+    if keep is None:
+        return evenly_spaced(positions, budget)
+    favoured = keep[positions]
+    kept = positions[favoured]
+    others = positions[~favoured]
+    # Favoured rows take whatever the other rows leave over, and never less than half the budget
+    kept_budget = min(len(kept), max(budget // 2, budget - len(others)))
+    return np.union1d(evenly_spaced(kept, kept_budget), evenly_spaced(others, budget - kept_budget))
+
+def decimate(df, max_points=MAX_PLOT_POINTS, keep=None):
+    """
+    Thins a time-sorted DataFrame of check results to at most max_points rows for display.
+    Each CheckName is thinned on its own, since a run logs one row per check and evenly spaced
+    picks across the interleaved rows would keep some checks and drop others entirely.
+
+    Args:
+        df (pd.DataFrame): The rows to thin out, with a categorical 'CheckName' column.
+        max_points (int, optional): Maximum number of rows to keep. Defaults to MAX_PLOT_POINTS.
+        keep (np.ndarray, optional): Boolean mask of rows to favour within each check (e.g. failures).
+    Returns:
+        pd.DataFrame: df itself if it is already small enough, otherwise the thinned rows.
+    """
+    if len(df) <= max_points:
+        return df
+
+    # Row positions grouped by check; the stable sort keeps each group in time order
+    codes = df['CheckName'].cat.codes.to_numpy()
+    order = np.argsort(codes, kind='stable')
+    groups = np.split(order, np.flatnonzero(np.diff(codes[order])) + 1)
+
+    # Share the budget evenly, smallest checks first so budget they don't need goes to the others
+    picks = []
+    remaining = max_points
+    groups.sort(key=len)
+    for n_left, positions in zip(range(len(groups), 0, -1), groups):
+        budget = min(len(positions), remaining // n_left)
+        picks.append(thin_positions(positions, budget, keep))
+        remaining -= budget
+    return df.iloc[np.sort(np.concatenate(picks))]
+
+def scatter_check_status(ax, checks, palette):
+    """
+    Draws one marker per check result on a row per CheckName, coloured by Success.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes to draw on.
+        checks (pd.DataFrame): Rows with 'Timestamp', categorical 'CheckName' and bool 'Success'.
+        palette (dict): Marker colour for each Success value (True/False).
+    """
+    names = checks['CheckName'].cat.categories
+    x = checks['Timestamp'].to_numpy()
+    y = checks['CheckName'].cat.codes.to_numpy()
+    success = checks['Success'].to_numpy()
+    # One vectorised call per status keeps a labelled artist for the legend
+    for status in (False, True):
+        mask = success == status
+        if mask.any():
+            ax.scatter(x[mask], y[mask], c=palette[status], s=30, edgecolors='white', linewidths=0.5,
+                       label=str(status), rasterized=True)
+    ax.set_yticks(range(len(names)))
+    ax.set_yticklabels(names)
+    ax.set_ylim(len(names) - 0.5, -0.5) # First check name at the top
+
+def plot_network_diagnostics(csv_path, output_file=None, days_to_display=None, df=None): # Added days_to_display
     """
     Reads network diagnostic data from a CSV file and generates timeline plots.
     Can either display the plot or save it to a file.
 
     Args:
         csv_path (str): The path to the input CSV file.
-        output_file (str, optional): Path to save the plot image.
-                                     If None, displays the plot instead. Defaults to None.
+        output_file (str or file-like, optional): Path or binary buffer to save the plot image to
+                                     (buffers receive PNG data). If None, displays the plot instead.
+                                     Defaults to None.
         days_to_display (int, optional): Number of past days to display data for.
                                          If None, all data is displayed. Defaults to None.
+        df (pd.DataFrame, optional): Log rows already loaded by the caller. If given, the CSV
+                                     is not read again. Defaults to None.
     Returns:
         bool: True if plotting (or saving) was successful, False otherwise.
     """
     # --- 1. Load and Prepare Data ---
     try:
-        if not os.path.exists(csv_path):
-            print(f"Error: CSV file not found at '{csv_path}'")
-            return False
-        if os.path.getsize(csv_path) == 0:
-            print(f"Error: CSV file '{csv_path}' is empty.")
-            return False
+        if df is not None:
+            # Shallow copy so the column conversions below don't alter the caller's frame
+            df = df.copy(deep=False)
+            print(f"Using {len(df)} records already loaded from '{csv_path}'")
+        else:
+            try:
+                csv_stat = os.stat(csv_path)
+            except FileNotFoundError:
+                print(f"Error: CSV file not found at '{csv_path}'")
+                return False
+            if csv_stat.st_size == 0:
+                print(f"Error: CSV file '{csv_path}' is empty.")
+                return False
 
-        df = pd.read_csv(csv_path)
-        print(f"Successfully loaded {len(df)} records from '{csv_path}'")
+            df = read_log(csv_path)
+            print(f"Successfully loaded {len(df)} records from '{csv_path}'")
 
         expected_cols = ['Timestamp', 'CheckType', 'CheckName', 'Success', 'ResponseTimeMs']
         if not all(col in df.columns for col in expected_cols):
@@ -46,11 +206,17 @@ def plot_network_diagnostics(csv_path, output_file=None, days_to_display=None):
         return False
 
     try:
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+        normalize_log(df)
     except Exception as e:
-        print(f"Error converting 'Timestamp' column to datetime: {e}")
+        print(f"Error converting the log columns: {e}")
         return False
 
+    # The date filter below binary-searches the cutoff, so rows must be in time order.
+    # The log is appended chronologically; only sort if that doesn't hold.
+    df = df.dropna(subset=['Timestamp'])
+    if not df['Timestamp'].is_monotonic_increasing:
+        df = df.sort_values(by='Timestamp', kind='mergesort')
+
     # <--- ADD THIS SECTION FOR DATE FILTERING --->
     if days_to_display is not None and isinstance(days_to_display, int) and days_to_display > 0:
         print(f"Filtering data for the last {days_to_display} days.")
@@ -58,7 +224,7 @@ def plot_network_diagnostics(csv_path, output_file=None, days_to_display=None):
         # Ensure cutoff_date is timezone-naive if df['Timestamp'] is, or make them compatible
         # If df['Timestamp'] is timezone-aware, you might need to make cutoff_date timezone-aware too.
         # Assuming df['Timestamp'] is timezone-naive based on typical CSV output.
-        df = df[df['Timestamp'] >= cutoff_date]
+        df = df.iloc[df['Timestamp'].searchsorted(cutoff_date, side='left'):]
         if df.empty:
             print(f"No data found within the last {days_to_display} days.")
             # You might want to still generate an empty plot or return False
@@ -66,19 +232,30 @@ def plot_network_diagnostics(csv_path, output_file=None, days_to_display=None):
     # <--- END OF DATE FILTERING SECTION --->
 
 
-    if df['Success'].dtype == 'object':
-        df['Success'] = df['Success'].astype(str).str.lower().map({'true': True, 'false': False, 'yes': True, 'no': False})
-    df['Success'] = df['Success'].astype('boolean')
-    df['Success'] = df['Success'].fillna(False)
-
+    # --- 2. Separate Data for Plotting ---
+    # Compare integer category codes rather than strings
+    df['CheckType'] = df['CheckType'].astype('category')
+    df['CheckName'] = df['CheckName'].astype('category')
+    check_types = df['CheckType'].cat.categories
 
-    df['ResponseTimeMs'] = pd.to_numeric(df['ResponseTimeMs'], errors='coerce')
-    df = df.sort_values(by='Timestamp')
+    # Pull each column out once and build every mask from the same arrays
+    ct = df['CheckType'].cat.codes.to_numpy()
+    succ = df['Success'].to_numpy()
+    rt = df['ResponseTimeMs'].to_numpy()
+    is_tcp = ct == category_code(check_types, 'Outbound TCP')
+    is_icmp = ct == category_code(check_types, 'Outbound ICMP')
+    is_inbound = ct == category_code(check_types, 'Inbound Listen Check')
+    outbound_mask = is_tcp | is_icmp
+    ping_mask = is_icmp & succ & ~np.isnan(rt)
 
-    # --- 2. Separate Data for Plotting ---
-    outbound_checks = df[df['CheckType'].isin(['Outbound TCP', 'Outbound ICMP'])]
-    inbound_checks = df[df['CheckType'] == 'Inbound Listen Check']
-    ping_speed_checks = df[(df['CheckType'] == 'Outbound ICMP') & (df['Success'] == True) & (df['ResponseTimeMs'].notna())]
+    outbound_checks = df.iloc[np.flatnonzero(outbound_mask)]
+    inbound_checks = df.iloc[np.flatnonzero(is_inbound)]
+    ping_speed_checks = df.iloc[np.flatnonzero(ping_mask)]
+    # scatter_check_status puts one y tick per CheckName category, so keep only the names present in each subset
+    # (the ping legend, built by groupby('CheckName'), then also lists only this subset's targets)
+    outbound_checks = outbound_checks.assign(CheckName=outbound_checks['CheckName'].cat.remove_unused_categories())
+    inbound_checks = inbound_checks.assign(CheckName=inbound_checks['CheckName'].cat.remove_unused_categories())
+    ping_speed_checks = ping_speed_checks.assign(CheckName=ping_speed_checks['CheckName'].cat.remove_unused_categories())
 
     if outbound_checks.empty and inbound_checks.empty and ping_speed_checks.empty:
         print("No data found for any plot type after filtering.")
@@ -93,8 +270,8 @@ def plot_network_diagnostics(csv_path, output_file=None, days_to_display=None):
             ax.set_xticks([])
             ax.set_yticks([])
             try:
-                plt.savefig(output_file, bbox_inches='tight')
-                print(f"Empty plot with message saved to '{output_file}'")
+                plt.savefig(output_file, format=None if isinstance(output_file, str) else 'png', bbox_inches='tight')
+                print(f"Empty plot with message saved to '{output_file if isinstance(output_file, str) else 'memory buffer'}'")
                 plt.close(fig)
                 return True
             except Exception as e:
@@ -105,106 +282,119 @@ def plot_network_diagnostics(csv_path, output_file=None, days_to_display=None):
             # Option 3: Return False
         return True # Or False if an empty plot isn't desired for saving
 
+    # Bound the number of points drawn; failures are never dropped from the status plots
+    outbound_checks = decimate(outbound_checks, keep=~outbound_checks['Success'].to_numpy())
+    inbound_checks = decimate(inbound_checks, keep=~inbound_checks['Success'].to_numpy())
+    ping_downsampled = len(ping_speed_checks) > MAX_PLOT_POINTS
+    if ping_downsampled:
+        ping_speed_checks = (ping_speed_checks.set_index('Timestamp')
+                             .groupby('CheckName', observed=True)['ResponseTimeMs']
+                             .resample(PING_RESAMPLE_RULE).mean()
+                             .dropna().reset_index())
+        print(f"Averaged ping speed over {PING_RESAMPLE_RULE} windows for display.")
+
 
     # --- 3. Create Plots ---
-    sns.set_theme(style="whitegrid")
-    fig, axes = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
-    fig.suptitle('Network Diagnostics Timeline', fontsize=16, y=0.99)
-
-    # Plot 1: Outbound Status
-    if not outbound_checks.empty:
-        print(f"Plotting Outbound Status ({len(outbound_checks)} points)...")
-        sns.scatterplot(data=outbound_checks, x='Timestamp', y='CheckName', hue='Success',
-                palette={True: 'green', False: 'red'}, ax=axes[0], s=30, legend='full') # s changed from 60 to 30
-        axes[0].set_title('Outbound Check Status (TCP/ICMP)')
-        axes[0].set_ylabel('Check Name')
-        axes[0].tick_params(axis='y', labelsize=8)
-        axes[0].legend(title='Success', loc='center left', bbox_to_anchor=(1, 0.5))
-    else:
-        axes[0].text(0.5, 0.5, 'No Outbound Check data available', ha='center', va='center', transform=axes[0].transAxes)
-        axes[0].set_title('Outbound Check Status (TCP/ICMP)')
-        axes[0].set_ylabel('Check Name')
-
-    # Plot 2: Inbound Listen Status
-    if not inbound_checks.empty:
-        print(f"Plotting Inbound Listen Status ({len(inbound_checks)} points)...")
-        sns.scatterplot(data=inbound_checks, x='Timestamp', y='CheckName', hue='Success',
-                palette={True: 'blue', False: 'orange'}, ax=axes[1], s=30, legend='full') # s changed from 60 to 30
-        axes[1].set_title('Inbound Port Listen Status')
-        axes[1].set_ylabel('Local Port Check')
-        axes[1].tick_params(axis='y', labelsize=8)
-        handles, labels = axes[1].get_legend_handles_labels()
-        label_map = {True: 'Listening', False: 'Not Listening'}
-        new_labels = []
-        valid_handles = []
-        for i, l in enumerate(labels):
-            try:
-                # Handle if labels are already boolean or string 'True'/'False'
-                actual_label = eval(l) if isinstance(l, str) else l
-                if actual_label in label_map:
-                    new_labels.append(label_map[actual_label])
-                    valid_handles.append(handles[i])
-            except NameError: # If eval fails because it's not 'True' or 'False'
-                print(f"Warning: Could not map legend label '{l}'")
-                new_labels.append(l) # Keep original label
-                valid_handles.append(handles[i])
-
-        if valid_handles: # Only show legend if there's something to show
-             axes[1].legend(valid_handles, new_labels, title='Status', loc='center left', bbox_to_anchor=(1, 0.5))
-    else:
-        axes[1].text(0.5, 0.5, 'No Inbound Listen Check data available', ha='center', va='center', transform=axes[1].transAxes)
-        axes[1].set_title('Inbound Port Listen Status')
-        axes[1].set_ylabel('Local Port Check')
-
-    # Plot 3: Ping Speed
-    if not ping_speed_checks.empty:
-        print(f"Plotting Ping Speed ({len(ping_speed_checks)} points)...")
-        sns.lineplot(data=ping_speed_checks, x='Timestamp', y='ResponseTimeMs', hue='CheckName',
-                     marker='o', ax=axes[2], legend='full')
-        axes[2].set_title('Ping Speed (Successful ICMP Checks)')
-        axes[2].set_ylabel('Average RTT (ms)')
-        axes[2].set_ylim(bottom=0) # Ensure RTT doesn't go below 0
-        # Ensure legend is only added if there are lines to label
-        if axes[2].has_data():
-            axes[2].legend(title='Ping Target', loc='center left', bbox_to_anchor=(1, 0.5), fontsize=8)
-    else:
-        axes[2].text(0.5, 0.5, 'No successful Ping data available', ha='center', va='center', transform=axes[2].transAxes)
-        axes[2].set_title('Ping Speed (Successful ICMP Checks)')
-        axes[2].set_ylabel('Average RTT (ms)')
-
-
-    # --- 4. Final Touches & Output ---
-    axes[2].set_xlabel('Timestamp')
-    try:
-        locator = mdates.AutoDateLocator(minticks=5, maxticks=10) # You can adjust minticks/maxticks
-        formatter = mdates.ConciseDateFormatter(locator)
-        axes[2].xaxis.set_major_locator(locator)
-        axes[2].xaxis.set_major_formatter(formatter)
-        plt.setp(axes[2].xaxis.get_majorticklabels(), rotation=30, ha='right')
-    except Exception as e:
-        print(f"Warning: Could not apply advanced date formatting: {e}")
-        plt.xticks(rotation=30, ha='right')
+    # Style is applied only inside this context so the caller's (e.g. NMO's) rcParams stay untouched
+    with plt.rc_context(PLOT_STYLE):
+        fig, axes = plt.subplots(3, 1, figsize=(15, 15), sharex=True)
+        fig.suptitle('Network Diagnostics Timeline', fontsize=16, y=0.99)
+
+        # Plot 1: Outbound Status
+        if not outbound_checks.empty:
+            print(f"Plotting Outbound Status ({len(outbound_checks)} points)...")
+            scatter_check_status(axes[0], outbound_checks, palette={True: 'green', False: 'red'})
+            axes[0].set_title('Outbound Check Status (TCP/ICMP)')
+            axes[0].set_ylabel('Check Name')
+            axes[0].tick_params(axis='y', labelsize=8)
+            axes[0].legend(title='Success', loc='center left', bbox_to_anchor=(1, 0.5))
+        else:
+            axes[0].text(0.5, 0.5, 'No Outbound Check data available', ha='center', va='center', transform=axes[0].transAxes)
+            axes[0].set_title('Outbound Check Status (TCP/ICMP)')
+            axes[0].set_ylabel('Check Name')
 
-    plt.tight_layout(rect=[0, 0.03, 0.9, 0.97])
+        # Plot 2: Inbound Listen Status
+        if not inbound_checks.empty:
+            print(f"Plotting Inbound Listen Status ({len(inbound_checks)} points)...")
+            scatter_check_status(axes[1], inbound_checks, palette={True: 'blue', False: 'orange'})
+            axes[1].set_title('Inbound Port Listen Status')
+            axes[1].set_ylabel('Local Port Check')
+            axes[1].tick_params(axis='y', labelsize=8)
+            handles, labels = axes[1].get_legend_handles_labels()
+            # Labels may be booleans or the strings 'True'/'False'
+            label_map = {True: 'Listening', False: 'Not Listening', 'True': 'Listening', 'False': 'Not Listening'}
+            new_labels = []
+            valid_handles = []
+            for handle, l in zip(handles, labels):
+                if l not in label_map:
+                    print(f"Warning: Could not map legend label '{l}'")
+                new_labels.append(label_map.get(l, l)) # Keep original label if it can't be mapped
+                valid_handles.append(handle)
 
-    if output_file:
+            if valid_handles: # Only show legend if there's something to show
+                 axes[1].legend(valid_handles, new_labels, title='Status', loc='center left', bbox_to_anchor=(1, 0.5))
+        else:
+            axes[1].text(0.5, 0.5, 'No Inbound Listen Check data available', ha='center', va='center', transform=axes[1].transAxes)
+            axes[1].set_title('Inbound Port Listen Status')
+            axes[1].set_ylabel('Local Port Check')
+
+        # Plot 3: Ping Speed
+        if not ping_speed_checks.empty:
+            print(f"Plotting Ping Speed ({len(ping_speed_checks)} points)...")
+            for check_name, target in ping_speed_checks.groupby('CheckName', observed=True):
+                axes[2].plot(target['Timestamp'].to_numpy(), target['ResponseTimeMs'].to_numpy(),
+                             marker=None if ping_downsampled else 'o', linewidth=0.8, label=check_name,
+                             rasterized=True)
+            axes[2].set_title('Ping Speed (Successful ICMP Checks)')
+            axes[2].set_ylabel('Average RTT (ms)')
+            axes[2].set_ylim(bottom=0) # Ensure RTT doesn't go below 0
+            # Ensure legend is only added if there are lines to label
+            if axes[2].has_data():
+                axes[2].legend(title='Ping Target', loc='center left', bbox_to_anchor=(1, 0.5), fontsize=8)
+        else:
+            axes[2].text(0.5, 0.5, 'No successful Ping data available', ha='center', va='center', transform=axes[2].transAxes)
+            axes[2].set_title('Ping Speed (Successful ICMP Checks)')
+            axes[2].set_ylabel('Average RTT (ms)')
+
+
+        # --- 4. Final Touches & Output ---
+        axes[2].set_xlabel('Timestamp')
         try:
-            output_dir = os.path.dirname(output_file)
-            if output_dir and not os.path.exists(output_dir):
-                os.makedirs(output_dir)
-                print(f"Created directory: {output_dir}")
-            plt.savefig(output_file, bbox_inches='tight')
-            print(f"Plot successfully saved to '{output_file}'")
-            plt.close(fig)
-            return True
+            locator = mdates.AutoDateLocator(minticks=5, maxticks=10) # You can adjust minticks/maxticks
+            formatter = mdates.ConciseDateFormatter(locator)
+            axes[2].xaxis.set_major_locator(locator)
+            axes[2].xaxis.set_major_formatter(formatter)
+            plt.setp(axes[2].xaxis.get_majorticklabels(), rotation=30, ha='right')
         except Exception as e:
-            print(f"Error saving plot to '{output_file}': {e}")
-            plt.close(fig)
-            return False
-    else:
-        print("Displaying plot...")
-        plt.show()
-        return True
+            print(f"Warning: Could not apply advanced date formatting: {e}")
+            plt.xticks(rotation=30, ha='right')
+
+        plt.tight_layout(rect=[0, 0.03, 0.9, 0.97])
+
+        if output_file:
+            try:
+                if isinstance(output_file, str):
+                    output_dir = os.path.dirname(output_file)
+                    if output_dir and not os.path.exists(output_dir):
+                        os.makedirs(output_dir)
+                        print(f"Created directory: {output_dir}")
+                is_path = isinstance(output_file, str)
+                # Buffers are written as PNG; Pillow's optimize option only applies to PNG output
+                is_png = not is_path or os.path.splitext(output_file)[1].lower() == '.png'
+                png_options = {'pil_kwargs': {'optimize': True}} if is_png else {}
+                plt.savefig(output_file, format=None if is_path else 'png',
+                            dpi=110, bbox_inches='tight', **png_options)
+                print(f"Plot successfully saved to '{output_file if isinstance(output_file, str) else 'memory buffer'}'")
+                plt.close(fig)
+                return True
+            except Exception as e:
+                print(f"Error saving plot to '{output_file}': {e}")
+                plt.close(fig)
+                return False
+        else:
+            print("Displaying plot...")
+            plt.show()
+            return True
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate timeline plots from network diagnostics CSV log.")
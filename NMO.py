@@ -1,8 +1,17 @@
 import os
+import io
+import re
 import subprocess
 import pandas as pd
 from datetime import datetime, timedelta
 import sys
+import smtplib
+from email.message import EmailMessage
+from concurrent.futures import ThreadPoolExecutor
+import matplotlib
+matplotlib.use('Agg') # Graphs are only ever saved to file here; never load a GUI toolkit
+# The log schema and reader are shared with the plotter so the two cannot drift apart
+from NDP import TIMESTAMP_FORMAT, CSV_DTYPES, read_log, normalize_log, category_code
 
 # --- Configuration ---
 SCRIPT_DIR = r"C:\Scripts\hulft_connect" # Base directory for all scripts/logs
@@ -17,10 +26,22 @@ plotter_script_path = os.path.join(SCRIPT_DIR, "NDP.py") # UPDATED FILENAME base
 # !! UPDATE this path if your VBScript has a different name !!
 vbs_script_path = os.path.join(SCRIPT_DIR, "SendEmail2Admin_HTML.vbs") # UPDATED FILENAME based on user context
 graph_output_path = os.path.join(SCRIPT_DIR, "network_status_graph.png") # Where to save the graph
+TAIL_READ_BYTES = 64 * 1024 # How much of the end of the log analyze_results reads
+GRAPH_DAYS = 3 # Days of history shown in the alert graph; also bounds how much of the log is loaded
+# PowerShell stderr messages that mean the CSV log could not be written: the FATAL message, or both
+# "Access to the path" and "is denied" anywhere in stderr (DOTALL, as error records wrap long paths)
+# Modify the pattern if your PowerShell script's FATAL error message changes
+PS_FATAL_PATTERN = re.compile(r"FATAL: Failed to write results to CSV|\A(?=.*Access to the path)(?=.*is denied)", re.DOTALL)
 
 # Email Configuration
 EMAIL_SUBJECT_FAILURE = "HULFT Network Alert: RDP or Outbound Connectivity Issues Detected" # Updated Subject
 EMAIL_BODY_FAILURE = "Critical network checks failed (RDP Listen or Outbound).|See attached graph for details.|Timestamp: {timestamp}" # Use '|' for newlines in VBScript
+# Optional direct SMTP delivery: when SMTP_SERVER is set, the graph is rendered in memory and mailed
+# with smtplib, skipping the PNG file and the VBScript sender. Leave as None to keep using the VBScript.
+SMTP_SERVER = None # e.g. "smtp.example.com"
+SMTP_PORT = 25
+EMAIL_FROM = "network-monitor@example.com"
+EMAIL_TO = [] # Recipient addresses, e.g. ["admin@example.com"]
 
 # --- Helper Functions ---
 
@@ -54,9 +75,8 @@ def run_powershell_script(script_path):
             print(f"Error: PowerShell script exited with non-zero code {result.returncode}", file=sys.stderr)
             success = False # Non-zero exit code indicates failure
 
-        # Check stderr for known critical errors even if exit code is 0
-        # Modify the string below if your PowerShell script's FATAL error message changes
-        if "FATAL: Failed to write results to CSV" in result.stderr or "Access to the path" in result.stderr and "is denied" in result.stderr:
+        # Check stderr for known critical errors even if exit code is 0 (single regex scan)
+        if result.stderr and PS_FATAL_PATTERN.search(result.stderr):
              print("Critical Error detected in PowerShell stderr: Failed to write CSV (likely permissions issue).", file=sys.stderr)
              success = False # Treat CSV write failure as critical
 
@@ -74,16 +94,153 @@ def run_powershell_script(script_path):
         print(f"An error occurred while running the PowerShell script: {e}", file=sys.stderr)
         return False
 
-def analyze_results(csv_path):
+def read_log_tail(csv_path, tail_bytes=TAIL_READ_BYTES):
+    """
+    Reads only the last rows of the diagnostics log, which is all the latest-run analysis needs.
+    Falls back to reading the whole file when the tail cannot be shown to hold a complete run.
+
+    Returns:
+        pd.DataFrame: The rows in the last tail_bytes of the file, or the whole log on fallback.
+    """
+    size = os.path.getsize(csv_path)
+    if size <= tail_bytes:
+        return read_log(csv_path)
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(size - tail_bytes)
+        tail = f.read()
+    tail = tail[tail.find(b'\n') + 1:] # Drop the partial first line
+
+    try:
+        df = read_log(io.BytesIO(header + tail))
+        timestamps = df['Timestamp']
+        # An older run in the tail proves the latest run starts inside it
+        if pd.api.types.is_datetime64_any_dtype(timestamps) and timestamps.min() < timestamps.max():
+            return df
+    except Exception as e:
+        print(f"Warning: Could not parse the end of '{csv_path}' on its own: {e}", file=sys.stderr)
+    print("Reading the full CSV log to find the complete latest run.")
+    return read_log(csv_path)
+
+def find_log_offset(csv_path, size, cutoff):
+    """
+    Finds where the rows logged at or after `cutoff` start, by binary search over the file.
+    The log is appended in time order and each row starts with its TIMESTAMP_FORMAT stamp,
+    so the stamps compare correctly as bytes.
+
+    Args:
+        csv_path (str): The path to the CSV log file.
+        size (int): Only the first `size` bytes are searched.
+        cutoff (datetime): The earliest timestamp to keep.
+    Returns:
+        int: Byte offset of the first such row, or `size` if there is none.
+    """
+    cutoff_key = cutoff.strftime(TIMESTAMP_FORMAT).encode()
+    with open(csv_path, 'rb') as f:
+        header_end = len(f.readline())
+
+        def line_start_from(position):
+            # First row starting at or after position
+            f.seek(position - 1)
+            f.readline()
+            return min(f.tell(), size)
+
+        lo, hi = header_end, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = line_start_from(mid)
+            if start < size and f.readline()[:len(cutoff_key)] < cutoff_key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return line_start_from(lo) if lo > header_end else header_end
+
+def read_log_window(csv_path, size, days):
+    """
+    Reads the rows of the last `days` days from the first `size` bytes of the log, i.e. the recent
+    rows that existed before a new check run. Only that window is parsed, however long the log is.
+    """
+    offset = find_log_offset(csv_path, size, datetime.now() - timedelta(days=days))
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        return read_log(io.BytesIO(header + f.read(size - offset)))
+
+def append_log_rows(previous_df, csv_path, offset):
+    """
+    Appends the rows written to the log after byte `offset` to an already loaded DataFrame.
+
+    Args:
+        previous_df (pd.DataFrame): The log rows read from the first `offset` bytes.
+        csv_path (str): The path to the CSV log file.
+        offset (int): File size at the time previous_df was read.
+    Returns:
+        pd.DataFrame: previous_df followed by the appended rows, or a full re-read if the file shrank.
+    """
+    if os.path.getsize(csv_path) < offset:
+        print("CSV log was rewritten during the check run; reading it again.")
+        return read_log(csv_path)
+
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        appended = f.read()
+    if not appended.strip():
+        return previous_df
+
+    new_rows = read_log(io.BytesIO(header + appended))
+    # Align categories so concat keeps the categorical columns instead of falling back to object
+    for column, dtype in CSV_DTYPES.items():
+        if dtype == 'category' and column in previous_df.columns and column in new_rows.columns:
+            categories = previous_df[column].cat.categories.union(new_rows[column].cat.categories)
+            previous_df[column] = previous_df[column].cat.set_categories(categories)
+            new_rows[column] = new_rows[column].cat.set_categories(categories)
+    return pd.concat([previous_df, new_rows], ignore_index=True)
+
+def critical_failure_mask(results):
+    """
+    Flags the failed checks that warrant an alert: the RDP listen check (Inbound, port 3389)
+    or any outbound TCP/ICMP check.
+
+    Args:
+        results (pd.DataFrame): Check results with categorical 'CheckType', 'TargetPort' and bool 'Success'.
+    Returns:
+        np.ndarray: Boolean mask over the rows of results.
+    """
+    check_types = results['CheckType'].astype('category')
+    categories = check_types.cat.categories
+    # Compare integer category codes rather than strings
+    codes = check_types.cat.codes.to_numpy()
+    is_rdp = (codes == category_code(categories, 'Inbound Listen Check')) & (results['TargetPort'].to_numpy() == 3389.0)
+    is_outbound = (codes == category_code(categories, 'Outbound TCP')) | (codes == category_code(categories, 'Outbound ICMP'))
+    return ~results['Success'].to_numpy() & (is_rdp | is_outbound)
+
+def describe_failure(row):
+    """Formats one failed check (a namedtuple from DataFrame.itertuples) for printing."""
+    port = getattr(row, 'TargetPort', None)
+    port_str = f":{int(port)}" if pd.notna(port) else ""
+    details = f"Check: {getattr(row, 'CheckName', 'N/A')}, Target: {getattr(row, 'TargetHost', 'N/A')}{port_str}"
+    if pd.notna(getattr(row, 'Details', None)):
+        details += f", Details: {row.Details}"
+    return details
+
+def analyze_results(csv_path, df=None):
     """
     Analyzes the latest results in the CSV log file.
     Determines if specific critical checks (RDP Listen or Outbound) failed.
-    
+
+    Args:
+        csv_path (str): The path to the CSV log file.
+        df (pd.DataFrame, optional): Log rows already loaded by the caller. If None, the end of
+                                     the CSV is read instead. Defaults to None.
 
     Returns:
-        tuple: (send_alert, latest_timestamp_str)
+        tuple: (send_alert, latest_timestamp_str, df)
                send_alert (bool): True if critical checks failed, False otherwise.
                latest_timestamp_str (str): Timestamp of the latest check, or current time if no data/error.
+               df (pd.DataFrame): The cleaned, time-sorted rows that were analyzed (only the end of the
+                                  log unless df was passed in), or None if no usable data was loaded.
     """
     print(f"Analyzing results from: {csv_path}...")
     now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -92,13 +249,18 @@ def analyze_results(csv_path):
 
     try:
         # --- Check File Existence and Modification Time ---
-        if not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0:
+        # One stat call covers existence, size and modification time
+        try:
+            csv_stat = os.stat(csv_path)
+        except FileNotFoundError:
+            csv_stat = None
+        if csv_stat is None or csv_stat.st_size == 0:
             print("Warning: CSV log file not found or is empty. Cannot determine status accurately.", file=sys.stderr)
             # 
-            return False, now_str
+            return False, now_str, None
 
         try:
-            file_mod_time_unix = os.path.getmtime(csv_path)
+            file_mod_time_unix = csv_stat.st_mtime
             file_mod_time = datetime.fromtimestamp(file_mod_time_unix)
             time_diff = datetime.now() - file_mod_time
             if time_diff > timedelta(minutes=stale_data_threshold_minutes):
@@ -109,133 +271,107 @@ def analyze_results(csv_path):
             print(f"Warning: Could not check CSV modification time: {e}", file=sys.stderr)
         # --- End Modification Time Check ---
 
-        df = pd.read_csv(csv_path)
+        if df is None:
+            df = read_log_tail(csv_path)
         if df.empty:
              print("Warning: CSV log file is empty after loading. Cannot determine status.", file=sys.stderr)
-             return False, now_str
+             return False, now_str, None
 
-        # Convert Timestamp and Success columns, handling potential errors
+        # Malformed timestamps become NaT, bad numbers NaN, unrecognised Success values False (failure)
         try:
-            df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-            # Convert TargetPort safely to numeric, coercing errors to NaN
-            df['TargetPort'] = pd.to_numeric(df['TargetPort'], errors='coerce')
+            normalize_log(df)
+        except KeyError:
+            raise # Reported as a missing column below
         except Exception as e:
-            print(f"Error converting CSV columns ('Timestamp', 'TargetPort'): {e}. Cannot reliably determine status.", file=sys.stderr)
-            return False, now_str # Treat data conversion errors as unable to determine status
-
-        if df['Success'].dtype == 'object':
-             df['Success'] = df['Success'].astype(str).str.lower().map({'true': True, 'false': False, 'yes': True, 'no': False})
-        # Use nullable boolean type, fill parse errors/NaNs as False (failure)
-        df['Success'] = df['Success'].astype('boolean').fillna(False)
+            print(f"Error converting CSV columns: {e}. Cannot reliably determine status.", file=sys.stderr)
+            return False, now_str, None # Treat data conversion errors as unable to determine status
 
         # Find the latest timestamp in the log
         if df['Timestamp'].isna().all():
              print("Error: All 'Timestamp' values are invalid after conversion.", file=sys.stderr)
-             return False, now_str
-        latest_timestamp = df['Timestamp'].max()
+             return False, now_str, None
+        df = df.dropna(subset=['Timestamp'])
+        # The log is appended in time order, so the newest run is the tail; only sort if that doesn't hold
+        if not df['Timestamp'].is_monotonic_increasing:
+            df = df.sort_values('Timestamp', kind='mergesort')
+        latest_timestamp = df['Timestamp'].iat[-1]
         latest_timestamp_str = latest_timestamp.strftime('%Y-%m-%d %H:%M:%S')
         print(f"Latest check timestamp found in log: {latest_timestamp_str}")
 
         # Filter results for the latest timestamp
-        latest_results = df[df['Timestamp'] == latest_timestamp]
+        latest_start = df['Timestamp'].searchsorted(latest_timestamp, side='left')
+        latest_results = df.iloc[latest_start:]
 
         if latest_results.empty:
             print(f"Warning: No results found matching the latest timestamp ({latest_timestamp}). Cannot determine status.", file=sys.stderr)
-            return False, latest_timestamp_str # Treat as unable to determine
+            return False, latest_timestamp_str, df # Treat as unable to determine
 
         # --- Apply Specific Failure Logic ---
-        # Find ALL failures in the latest run first
-        all_failures = latest_results[latest_results['Success'] == False]
+        # Classify every row of the latest run in one pass
+        failed = ~latest_results['Success'].to_numpy()
+        critical = critical_failure_mask(latest_results)
 
-        if all_failures.empty:
+        if not failed.any():
             print(f"Network Status OK: All checks in the latest run ({latest_timestamp_str}) were successful.")
             send_alert = False
         else:
-            # Check if any of these failures meet the CRITICAL criteria for alerting
-            # Criterion 1: RDP Listen Check Failure (Inbound, Port 3389)
-            is_rdp_failure = not all_failures[
-                (all_failures['CheckType'] == 'Inbound Listen Check') &
-                (all_failures['TargetPort'] == 3389.0) # Ensure float comparison if TargetPort was coerced
-            ].empty
-
-            # Criterion 2: Any Outbound Check Failure (TCP or ICMP)
-            is_outbound_failure = not all_failures[
-                all_failures['CheckType'].isin(["Outbound TCP", "Outbound ICMP"])
-            ].empty
-
-            # Determine if an alert should be sent
-            send_alert = is_rdp_failure or is_outbound_failure
+            # Alert only if a failure meets the CRITICAL criteria (RDP listen on 3389 or any outbound check)
+            send_alert = bool(critical.any())
 
             if send_alert:
                 print(f"ALERT Condition Met: Critical check(s) failed in the latest run ({latest_timestamp_str}):")
-                # Filter all_failures to show only the ones meeting the criteria
-                critical_failures = all_failures[
-                    ((all_failures['CheckType'] == 'Inbound Listen Check') & (all_failures['TargetPort'] == 3389.0)) |
-                    (all_failures['CheckType'].isin(["Outbound TCP", "Outbound ICMP"]))
-                ]
+                critical_failures = latest_results[critical]
                 # Print details for the critical failures causing the alert
-                for index, row in critical_failures.head(10).iterrows(): # Limit printing details
-                     port_str = f":{int(row['TargetPort'])}" if pd.notna(row['TargetPort']) else ""
-                     details = f"Check: {row.get('CheckName', 'N/A')}, Target: {row.get('TargetHost', 'N/A')}{port_str}"
-                     if pd.notna(row.get('Details')):
-                         details += f", Details: {row.get('Details')}"
-                     print(f"  - {details}")
+                for row in critical_failures.head(10).itertuples(index=False): # Limit printing details
+                     print(f"  - {describe_failure(row)}")
                 if len(critical_failures) > 10:
                     print(f"  ... and {len(critical_failures)-10} more critical failures.")
             else:
                 # Failures occurred, but none were the specific critical ones
                 print(f"Network Warning: Non-critical check(s) failed in the latest run ({latest_timestamp_str}). No alert triggered.")
                 # Optionally print details of non-critical failures here
-                non_critical_failures = all_failures[
-                    ~(((all_failures['CheckType'] == 'Inbound Listen Check') & (all_failures['TargetPort'] == 3389.0)) |
-                      (all_failures['CheckType'].isin(["Outbound TCP", "Outbound ICMP"])))
-                ]
-                for index, row in non_critical_failures.head(5).iterrows(): # Limit printing details
-                     port_str = f":{int(row['TargetPort'])}" if pd.notna(row['TargetPort']) else ""
-                     details = f"Check: {row.get('CheckName', 'N/A')}, Target: {row.get('TargetHost', 'N/A')}{port_str}"
-                     if pd.notna(row.get('Details')):
-                         details += f", Details: {row.get('Details')}"
-                     print(f"  - [Non-Alerting Failure] {details}")
+                non_critical_failures = latest_results[failed & ~critical]
+                for row in non_critical_failures.head(5).itertuples(index=False): # Limit printing details
+                     print(f"  - [Non-Alerting Failure] {describe_failure(row)}")
                 if len(non_critical_failures) > 5:
                     print(f"  ... and {len(non_critical_failures)-5} more non-critical failures.")
 
-        return send_alert, latest_timestamp_str
+        return send_alert, latest_timestamp_str, df
 
     except pd.errors.EmptyDataError:
         print("Warning: CSV log file is empty or contains no data after loading.", file=sys.stderr)
-        return False, now_str # Cannot determine status
+        return False, now_str, None # Cannot determine status
     except KeyError as e:
         print(f"Error: Missing expected column in CSV for analysis: {e}", file=sys.stderr)
-        return False, now_str # Cannot determine status
+        return False, now_str, None # Cannot determine status
     except Exception as e:
         print(f"Error analyzing CSV file '{csv_path}': {e}", file=sys.stderr)
-        return False, now_str # Treat analysis errors as unable to determine status reliably
-
-def generate_graph(plotter_script, csv_log, output_path, days_to_display=None): # Added days_to_display
-    """Runs the Python plotting script to save the graph."""
+        return False, now_str, None # Treat analysis errors as unable to determine status reliably
+
+def load_plotter(plotter_script):
+    """Imports the plotting script as a module so it can run in this process."""
+    import importlib
+    plotter_dir, plotter_file = os.path.split(os.path.abspath(plotter_script))
+    if plotter_dir not in sys.path:
+        sys.path.insert(0, plotter_dir)
+    return importlib.import_module(os.path.splitext(plotter_file)[0])
+
+def generate_graph(plotter_script, csv_log, output_path, days_to_display=None, df=None): # Added days_to_display
+    """Calls the plotting script in-process to save the graph, reusing df (the parsed log) if given."""
     print(f"Generating graph using: {plotter_script}...")
     try:
         if not os.path.exists(plotter_script):
              print(f"Error: Plotter script not found at '{plotter_script}'", file=sys.stderr)
              return False
 
-        command = [sys.executable, plotter_script, csv_log, "-o", output_path]
-        # <--- ADD DAYS ARGUMENT TO COMMAND --->
-        if days_to_display is not None:
-            command.extend(["-d", str(days_to_display)])
-        # <--- END OF ADDITION --->
-
-        result = subprocess.run(command, capture_output=True, text=True, check=False, encoding='utf-8', errors='ignore')
+        plotter = load_plotter(plotter_script)
 
         print("--- Plotter Script Output ---")
-        if result.stdout:
-            print(result.stdout)
-        if result.stderr:
-            print(f"Plotter Errors/Warnings:\n{result.stderr}", file=sys.stderr)
+        plotted = plotter.plot_network_diagnostics(csv_log, output_path, days_to_display=days_to_display, df=df)
         print("--- End Plotter Output ---")
 
-        if result.returncode != 0:
-            print(f"Warning: Plotter script exited with code {result.returncode}. Graph might not be generated correctly.", file=sys.stderr)
+        if not plotted:
+            print("Warning: Plotter reported a failure. Graph might not be generated correctly.", file=sys.stderr)
 
         if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
              print(f"Graph saved successfully to {output_path}")
@@ -244,14 +380,60 @@ def generate_graph(plotter_script, csv_log, output_path, days_to_display=None):
              print(f"Error: Graph file '{output_path}' was not created or is empty.", file=sys.stderr)
              return False
 
-    except FileNotFoundError:
-        print(f"Error: Python executable '{sys.executable}' not found.", file=sys.stderr)
+    except ImportError as e:
+        print(f"Error: Could not import plotter script '{plotter_script}': {e}", file=sys.stderr)
         return False
     except Exception as e:
         print(f"An error occurred while running the plotter script: {e}", file=sys.stderr)
         return False
 
 
+def render_graph_png(plotter_script, csv_log, days_to_display=None, df=None):
+    """Calls the plotting script in-process and returns the graph as PNG bytes, or None on failure."""
+    print(f"Rendering graph in memory using: {plotter_script}...")
+    try:
+        plotter = load_plotter(plotter_script)
+        png_buffer = io.BytesIO()
+
+        print("--- Plotter Script Output ---")
+        plotted = plotter.plot_network_diagnostics(csv_log, png_buffer, days_to_display=days_to_display, df=df)
+        print("--- End Plotter Output ---")
+
+        if not plotted or png_buffer.tell() == 0:
+            print("Error: Plotter did not produce a graph.", file=sys.stderr)
+            return None
+        return png_buffer.getvalue()
+
+    except ImportError as e:
+        print(f"Error: Could not import plotter script '{plotter_script}': {e}", file=sys.stderr)
+        return None
+    except Exception as e:
+        print(f"An error occurred while running the plotter script: {e}", file=sys.stderr)
+        return None
+
+
+def send_email_smtp(subject, body, png_bytes):
+    """Sends the alert email through SMTP_SERVER with the graph attached straight from memory."""
+    print(f"Sending email notification via SMTP server {SMTP_SERVER}...")
+    try:
+        message = EmailMessage()
+        message['Subject'] = subject
+        message['From'] = EMAIL_FROM
+        message['To'] = ", ".join(EMAIL_TO)
+        message.set_content(body.replace("|", "\n")) # '|' marks newlines for the VBScript sender
+        message.add_attachment(png_bytes, maintype='image', subtype='png',
+                               filename=os.path.basename(graph_output_path))
+
+        with smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=60) as smtp:
+            smtp.send_message(message)
+        print("Email sent successfully.")
+        return True
+
+    except (smtplib.SMTPException, OSError) as e:
+        print(f"Error: SMTP email sending failed: {e}", file=sys.stderr)
+        return False
+
+
 def send_email_notification(vbs_script, subject, body, attachment_path):
     """Calls the VBScript to send an email with attachment."""
     print("Sending email notification...")
@@ -306,28 +488,54 @@ if __name__ == "__main__":
     abort = False
     if not check_file_exists(ps_script_path, "PowerShell Script"): abort = True
     if not check_file_exists(plotter_script_path, "Python Plotter Script"): abort = True
-    if not check_file_exists(vbs_script_path, "VBScript Email Script"): abort = True
+    if not SMTP_SERVER and not check_file_exists(vbs_script_path, "VBScript Email Script"): abort = True
     if abort:
         print("One or more required script files are missing. Aborting.", file=sys.stderr)
         sys.exit(1)
     print("Required script files found.")
+    if SMTP_SERVER and not EMAIL_TO:
+        print("Error: SMTP_SERVER is set but EMAIL_TO has no recipients. Aborting.", file=sys.stderr)
+        sys.exit(1)
     # --- End Initial Checks ---
 
-    # 1. Run the PowerShell network check
-    ps_success = run_powershell_script(ps_script_path)
+    # 1. Run the PowerShell network check, parsing the recent part of the existing log in the background meanwhile.
+    #    Only the GRAPH_DAYS window the graph shows is loaded, so memory stays bounded as the log grows;
+    #    the window ends with the newest run, so the analysis can use it too.
+    log_size_before = os.path.getsize(csv_log_path) if os.path.exists(csv_log_path) else 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        previous_log_future = executor.submit(read_log_window, csv_log_path, log_size_before, GRAPH_DAYS) if log_size_before else None
+        ps_success = run_powershell_script(ps_script_path)
     if not ps_success:
         print("Warning: PowerShell script execution failed or had critical errors. Analysis/Graphing might be based on old data.", file=sys.stderr)
         # Decide whether to continue or exit if PS fails. Let's continue for now.
 
+    # Add the rows written by this run to the log loaded in the background
+    log_df = None
+    if previous_log_future is not None:
+        try:
+            log_df = append_log_rows(previous_log_future.result(), csv_log_path, log_size_before)
+        except Exception as e:
+            print(f"Warning: Could not load the CSV log alongside the check run: {e}", file=sys.stderr)
+        if log_df is not None and log_df.empty:
+            log_df = None # Nothing logged recently (e.g. the check run failed); analyze_results reads the last run itself
+
     # 2. Analyze the results from the CSV using the new specific logic
-    send_alert_based_on_criteria, timestamp_str = analyze_results(csv_log_path)
+    send_alert_based_on_criteria, timestamp_str, analyzed_df = analyze_results(csv_log_path, df=log_df)
+    # Only the loaded window can be reused for the graph; a tail read covers just the latest run
+    plot_df = analyzed_df if log_df is not None else None
 
     # 3. Generate the graph (always attempt if CSV exists, provides context)
+    #    With SMTP delivery the graph only exists as an email attachment, so render it in memory when alerting
     graph_generated = False # Default to false
-    if os.path.exists(csv_log_path): # Only try to graph if log exists
-        graph_generated = generate_graph(plotter_script_path, csv_log_path, graph_output_path, days_to_display=3) # MODIFIED
-    else:
+    graph_png = None
+    if not os.path.exists(csv_log_path): # Only try to graph if log exists
         print("Skipping graph generation because CSV log file does not exist.")
+    elif SMTP_SERVER:
+        if send_alert_based_on_criteria:
+            graph_png = render_graph_png(plotter_script_path, csv_log_path, days_to_display=GRAPH_DAYS, df=plot_df)
+            graph_generated = graph_png is not None
+    else:
+        graph_generated = generate_graph(plotter_script_path, csv_log_path, graph_output_path, days_to_display=GRAPH_DAYS, df=plot_df) # MODIFIED
 
 
     # 4. Send email only if the specific alert criteria were met AND the graph was generated
@@ -336,7 +544,10 @@ if __name__ == "__main__":
         print("ALERT condition met based on specific criteria (RDP Listen or Outbound failure). Preparing email notification.")
         if graph_generated:
             email_body = EMAIL_BODY_FAILURE.format(timestamp=timestamp_str)
-            email_success = send_email_notification(vbs_script_path, EMAIL_SUBJECT_FAILURE, email_body, graph_output_path)
+            if SMTP_SERVER:
+                email_success = send_email_smtp(EMAIL_SUBJECT_FAILURE, email_body, graph_png)
+            else:
+                email_success = send_email_notification(vbs_script_path, EMAIL_SUBJECT_FAILURE, email_body, graph_output_path)
             if not email_success:
                 print("Email notification failed to send.", file=sys.stderr)
         else:
@@ -6,7 +6,7 @@ Analyzes service status changes from a CSV file and generates
 a visually appealing heatmap of activity for a user-specified month.
 
 Improvements:
-- Prompts user to select a month (1-12) for visualization.
+- Selects the month(s) via --month/--year, prompting only when run interactively.
 - Focuses visualization *only* on the selected month's activity heatmap.
 - Uses Seaborn for significantly improved aesthetics ("gorgeous" plots).
 - Implements a Day of Month vs. Hour heatmap using a 'YlOrRd' colormap.
@@ -19,15 +19,23 @@ Improvements:
 
 import pandas as pd
 import numpy as np
+import matplotlib
+import os
+import sys
+# Without a display (e.g. scheduled or CI runs on Linux) render with the non-interactive Agg backend
+if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+    matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import matplotlib.ticker as mticker
 import seaborn as sns
 from datetime import datetime, date
 from typing import Dict, Optional, Tuple, List
+import argparse
 import logging
-import sys
 import traceback
 import calendar
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging
 logging.basicConfig(
@@ -41,6 +49,16 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+# Use Arrow's multithreaded CSV parser when pyarrow is installed, otherwise pandas' C parser
+CSV_ENGINE = 'pyarrow' if HAS_PYARROW else 'c'
+# Preprocessed data is cached next to the CSV as '<csv path>.v<N>.feather' (requires pyarrow).
+# Bump CACHE_VERSION whenever the preprocessed columns change so stale caches are ignored.
+CACHE_VERSION = 3
+CACHE_SUFFIX = f'.v{CACHE_VERSION}.feather'
+# Agg cannot show windows, so heatmaps are written to PNG files instead
+HEADLESS = matplotlib.get_backend().lower() == 'agg'
+
 class ServiceInsightsEngine:
     """
     Analyzes service status changes and generates insights and a heatmap visualization
@@ -54,6 +72,11 @@ class ServiceInsightsEngine:
             csv_path (str): The path to the CSV file containing service status data.
         """
         self.df: Optional[pd.DataFrame] = self._load_and_preprocess_data(csv_path)
+        # Sorted timestamp array, used to find runs of simultaneous changes
+        self._ts_values: Optional[np.ndarray] = self.df['timestamp'].to_numpy() if self.df is not None else None
+        # (months, 31, 24) change counts for every month in the data, built on first use
+        self._hourly_counts: Optional[np.ndarray] = None
+        self._hourly_counts_first_year: int = 0
         self.insights: Dict = {}
         # Set theme: Use 'white' style for no background grid, keep the requested palette
         sns.set_theme(style="white", palette="YlOrRd", font_scale=1.1)
@@ -70,16 +93,23 @@ class ServiceInsightsEngine:
             Optional[pd.DataFrame]: The preprocessed DataFrame, or None if loading fails.
         """
         logger.info(f"Attempting to load data from: {path}")
+        cached_df = self._read_cached_data(path)
+        if cached_df is not None:
+            return cached_df
+
+        required_cols = ['Timestamp', 'ServiceName', 'PreviousStatus', 'CurrentStatus']
         try:
-            df = pd.read_csv(path)
+            # Load only the needed columns, with the repeating strings stored as categoricals
+            df = pd.read_csv(
+                path,
+                usecols=required_cols,
+                dtype={'ServiceName': 'category', 'PreviousStatus': 'category', 'CurrentStatus': 'category'},
+                parse_dates=['Timestamp'],
+                cache_dates=True,
+                engine=CSV_ENGINE
+            )
             logger.info(f"Successfully loaded {len(df)} rows.")
 
-            required_cols = {'Timestamp', 'ServiceName', 'PreviousStatus', 'CurrentStatus'}
-            if not required_cols.issubset(df.columns):
-                missing = required_cols - set(df.columns)
-                logger.error(f"Critical Error: Missing required columns: {missing}. Aborting.")
-                return None
-
             df = df.rename(columns={
                 'Timestamp': 'timestamp',
                 'ServiceName': 'service_name',
@@ -88,7 +118,9 @@ class ServiceInsightsEngine:
             })
             logger.info("Renamed columns for internal consistency.")
 
-            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+            # read_csv leaves the column unparsed if any timestamp is malformed; coerce those to NaT
+            if not pd.api.types.is_datetime64_any_dtype(df['timestamp']):
+                df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
             original_len = len(df)
             df.dropna(subset=['timestamp'], inplace=True)
             if len(df) < original_len:
@@ -98,17 +130,24 @@ class ServiceInsightsEngine:
                  logger.error("Critical Error: No valid data remaining after timestamp parsing. Aborting.")
                  return None
 
-            df['date'] = df['timestamp'].dt.date
-            df['hour'] = df['timestamp'].dt.hour
-            df['day_of_week'] = df['timestamp'].dt.day_name()
-            df['day_of_month'] = df['timestamp'].dt.day
-            df['month'] = df['timestamp'].dt.month
-            df['year'] = df['timestamp'].dt.year
-            logger.info("Added time-based features (date, hour, day_of_week, day_of_month, month, year).")
+            # Derive the calendar fields with numpy unit casts on the datetime64 values rather than
+            # one .dt pass per field. 'date' and 'day_of_week' are not used anywhere and are skipped.
+            ts = df['timestamp'].to_numpy()
+            days = ts.astype('datetime64[D]')
+            months = ts.astype('datetime64[M]')
+            years = ts.astype('datetime64[Y]')
+            # Stored in the smallest integer types that fit (uint8 for hour/day/month, uint16 for year)
+            df['hour'] = ((ts - days) // np.timedelta64(1, 'h')).astype(np.uint8)
+            df['day_of_month'] = ((days - months.astype('datetime64[D]')) // np.timedelta64(1, 'D') + 1).astype(np.uint8)
+            df['month'] = ((months - years.astype('datetime64[M]')) // np.timedelta64(1, 'M') + 1).astype(np.uint8)
+            df['year'] = (years.astype(np.int64) + 1970).astype(np.uint16)
+            logger.info("Added time-based features (hour, day_of_month, month, year).")
 
             df.sort_values(by='timestamp', inplace=True)
+            df.reset_index(drop=True, inplace=True) # Feather only stores a default index
             logger.info("Data sorted by timestamp.")
 
+            self._write_cached_data(df, path)
             logger.info("Data loading and preprocessing completed successfully.")
             return df
 
@@ -118,20 +157,84 @@ class ServiceInsightsEngine:
         except pd.errors.EmptyDataError:
             logger.error(f"Critical Error: File at '{path}' is empty. Aborting.")
             return None
+        except pd.errors.ParserError as e:
+            # Malformed rows (e.g. extra fields); ParserError subclasses ValueError, so it is caught first
+            logger.error(f"Critical Error: Could not parse '{path}': {e}. Aborting.")
+            return None
+        except (ValueError, KeyError) as e:
+            # Raised by usecols when any of the required columns is absent (KeyError from the pyarrow engine)
+            logger.error(f"Critical Error: Missing required columns {required_cols}: {e}. Aborting.")
+            return None
         except Exception as e:
             logger.error(f"An unexpected error occurred during data loading: {e}", exc_info=True)
             return None
 
-    # --- Methods for calculate_stability_metrics and analyze_correlations remain unchanged ---
+    def _read_cached_data(self, path: str) -> Optional[pd.DataFrame]:
+        """
+        Loads the preprocessed DataFrame from the Feather cache if it is newer than the CSV.
+
+        Args:
+            path (str): The path to the source CSV file.
+
+        Returns:
+            Optional[pd.DataFrame]: The cached DataFrame, or None if there is no usable cache.
+        """
+        if not HAS_PYARROW:
+            return None
+        cache_path = path + CACHE_SUFFIX
+        try:
+            if os.path.getmtime(cache_path) <= os.path.getmtime(path):
+                logger.info(f"Cache '{cache_path}' is older than the CSV; reprocessing.")
+                return None
+            df = pd.read_feather(cache_path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Could not read cache '{cache_path}': {e}. Reprocessing the CSV.")
+            return None
+        logger.info(f"Loaded {len(df)} preprocessed rows from cache: {cache_path}")
+        return df
+
+    def _write_cached_data(self, df: pd.DataFrame, path: str) -> None:
+        """
+        Saves the preprocessed DataFrame as a Feather cache next to the CSV.
+
+        Args:
+            df (pd.DataFrame): The preprocessed DataFrame.
+            path (str): The path to the source CSV file.
+        """
+        if not HAS_PYARROW:
+            return
+        cache_path = path + CACHE_SUFFIX
+        try:
+            df.to_feather(cache_path)
+            logger.info(f"Cached preprocessed data to: {cache_path}")
+        except Exception as e:
+            logger.warning(f"Could not write cache '{cache_path}': {e}")
+
     def calculate_stability_metrics(self) -> None:
         """ Calculates key stability metrics (kept for potential future use). """
         if self.df is None: return
         logger.info("Calculating stability metrics...")
         self.insights['total_changes_per_service'] = self.df['service_name'].value_counts().to_dict()
-        self.df['time_diff_seconds'] = self.df.groupby('service_name')['timestamp'].diff().dt.total_seconds()
-        self.df['duration_in_previous_state_seconds'] = self.df.groupby('service_name')['time_diff_seconds'].shift(-1).fillna(0)
-        time_in_state = self.df.groupby(['service_name', 'previous_status'])['duration_in_previous_state_seconds'].sum()
-        time_in_state_hours = (time_in_state / 3600).unstack(fill_value=0)
+        # Time spent in the previous status is the gap until the service's next change (0 for its last change).
+        # Group rows by service with a stable sort so each service's changes stay in timestamp order.
+        service_codes, services = pd.factorize(self.df['service_name'], sort=True)
+        status_codes, statuses = pd.factorize(self.df['previous_status'], sort=True)
+        order = np.argsort(service_codes, kind='stable')
+        service_codes, status_codes = service_codes[order], status_codes[order]
+        ts_ns = self.df['timestamp'].to_numpy('datetime64[ns]')[order].view(np.int64)
+        duration = np.zeros(len(order))
+        same_service = (service_codes[1:] == service_codes[:-1]) & (service_codes[1:] >= 0)
+        duration[:-1] = np.where(same_service, np.diff(ts_ns) / 1e9, 0.0)
+
+        # Sum the durations into a (service, status) grid in one bincount; missing names/statuses are skipped
+        valid = (service_codes >= 0) & (status_codes >= 0)
+        cell = service_codes[valid] * len(statuses) + status_codes[valid]
+        grid_size = len(services) * len(statuses)
+        time_in_state = np.bincount(cell, weights=duration[valid], minlength=grid_size).reshape(len(services), len(statuses))
+        present = np.bincount(service_codes[valid], minlength=len(services)) > 0
+        time_in_state_hours = pd.DataFrame(time_in_state[present] / 3600, index=services[present], columns=statuses)
         self.insights['time_in_state_hours_per_service'] = time_in_state_hours.to_dict('index')
         logger.info("Stability metrics calculated.")
 
@@ -139,61 +242,68 @@ class ServiceInsightsEngine:
         """ Analyzes basic correlations (kept for potential future use). """
         if self.df is None: return
         logger.info("Analyzing correlations (simultaneous changes)...")
-        simultaneous_changes_df = self.df[self.df.duplicated(subset=['timestamp'], keep=False)]
-        simultaneous_events = simultaneous_changes_df.groupby('timestamp').apply(
-            lambda x: x[['service_name', 'previous_status', 'current_status']].to_dict('records')
-        ).reset_index(name='changes')
-        self.insights['simultaneous_change_events'] = simultaneous_events.to_dict('records')
+        simultaneous = self.df['timestamp'].duplicated(keep=False).to_numpy()
+        ts = self._ts_values[simultaneous]
+        # Rows are sorted by timestamp, so each simultaneous event is a contiguous run of equal timestamps
+        run_start = np.ones(len(ts), dtype=bool)
+        run_start[1:] = ts[1:] != ts[:-1]
+        starts = np.flatnonzero(run_start)
+        ends = np.r_[starts[1:], len(ts)]
+        changes = [
+            {'service_name': service, 'previous_status': previous, 'current_status': current}
+            for service, previous, current in zip(
+                self.df['service_name'].to_numpy()[simultaneous].tolist(),
+                self.df['previous_status'].to_numpy()[simultaneous].tolist(),
+                self.df['current_status'].to_numpy()[simultaneous].tolist(),
+            )
+        ]
+        simultaneous_events = [
+            {'timestamp': timestamp, 'changes': changes[start:end]}
+            for timestamp, start, end in zip(pd.DatetimeIndex(ts[starts]), starts, ends)
+        ]
+        self.insights['simultaneous_change_events'] = simultaneous_events
         logger.info(f"Found {len(simultaneous_events)} timestamps with simultaneous changes.")
 
-    def _filter_for_specific_month(self, year: int, month: int) -> Optional[pd.DataFrame]:
+    def _month_hourly_counts(self, year: int, month: int) -> Optional[np.ndarray]:
         """
-        Filters the main DataFrame for records within the specified calendar month and year.
+        Returns the (days_in_month, 24) change counts for a month from the precomputed histogram.
 
         Args:
-            year (int): The year to filter by.
-            month (int): The month number (1-12) to filter by.
+            year (int): The year to look up.
+            month (int): The month number (1-12) to look up.
 
         Returns:
-            Optional[pd.DataFrame]: Filtered DataFrame or None if no data.
+            Optional[np.ndarray]: Counts per day of month and hour, or None if the month has no data.
         """
         if self.df is None:
-            logger.warning("DataFrame not loaded. Cannot filter.")
+            logger.warning("DataFrame not loaded. Cannot count changes.")
             return None
 
-        try:
-            # Validate month input just in case
-            if not 1 <= month <= 12:
-                 logger.error(f"Invalid month provided to filter function: {month}. Must be 1-12.")
-                 return None
-
-            # Calculate the start and end timestamps for the given month and year
-            start_of_month = datetime(year, month, 1)
-            # Get the number of days in the month
-            _, days_in_month = calendar.monthrange(year, month)
-            # End of month is the last day at 23:59:59.999999
-            end_of_month = datetime(year, month, days_in_month, 23, 59, 59, 999999)
-
-            # Filter the DataFrame
-            month_df = self.df[
-                (self.df['timestamp'] >= start_of_month) &
-                (self.df['timestamp'] <= end_of_month)
-            ].copy()
-
-            month_name = start_of_month.strftime('%B') # Get month name for logging
-            if month_df.empty:
-                logger.warning(f"No data found for the specified period: {month_name} {year}.")
-                return None
-
-            logger.info(f"Filtered data for {month_name} {year} ({start_of_month.strftime('%Y-%m-%d')} to {end_of_month.strftime('%Y-%m-%d')}). Found {len(month_df)} records.")
-            return month_df
-
-        except Exception as e:
-            logger.error(f"Error during filtering for {year}-{month}: {e}", exc_info=True)
+        if self._hourly_counts is None:
+            # One bincount over (month since first year, day, hour) serves every later month lookup
+            years = self.df['year'].to_numpy(np.intp)
+            self._hourly_counts_first_year = int(years.min())
+            month_idx = (years - self._hourly_counts_first_year) * 12 + self.df['month'].to_numpy(np.intp) - 1
+            cell = (month_idx * 31 + self.df['day_of_month'].to_numpy(np.intp) - 1) * 24 + self.df['hour'].to_numpy(np.intp)
+            n_months = int(month_idx.max()) + 1
+            self._hourly_counts = np.bincount(cell, minlength=n_months * 31 * 24).reshape(n_months, 31, 24)
+            logger.info(f"Precomputed hourly change counts for {n_months} month(s).")
+
+        month_idx = (year - self._hourly_counts_first_year) * 12 + month - 1
+        _, days_in_month = calendar.monthrange(year, month)
+        if not 0 <= month_idx < len(self._hourly_counts):
+            counts = None
+        else:
+            counts = self._hourly_counts[month_idx, :days_in_month]
+
+        month_name = datetime(year, month, 1).strftime('%B')
+        if counts is None or not counts.any():
+            logger.warning(f"No data found for the specified period: {month_name} {year}.")
             return None
+        logger.info(f"Found {int(counts.sum())} records for {month_name} {year}.")
+        return counts
 
-
-    def visualize_heatmap_for_month(self, year: int, month: int) -> None:
+    def visualize_heatmap_for_month(self, year: int, month: int, output_file: Optional[str] = None) -> None:
         """
         Generates and displays the heatmap visualization for the specified month and year.
         Ensures all hour labels (0-23) are shown on the x-axis. Uses 'white' style.
@@ -201,13 +311,15 @@ class ServiceInsightsEngine:
         Args:
             year (int): The year to visualize.
             month (int): The month number (1-12) to visualize.
+            output_file (Optional[str]): Save the heatmap to this file instead of showing it.
+                Headless runs default to 'service_heatmap_<year>_<month>.png'.
         """
         month_name = datetime(year, month, 1).strftime('%B') # Get month name for titles
         logger.info(f"Generating heatmap visualization for {month_name} {year}...")
 
-        df_month = self._filter_for_specific_month(year=year, month=month)
+        heatmap_counts = self._month_hourly_counts(year=year, month=month)
 
-        if df_month is None or df_month.empty:
+        if heatmap_counts is None:
             logger.warning(f"No data available for {month_name} {year} to visualize.")
             # Display a message plot
             fig, ax = plt.subplots(figsize=(10, 2))
@@ -217,7 +329,7 @@ class ServiceInsightsEngine:
             ax.axis('off')
             plt.suptitle(f"Service Status Changes: {month_name} {year}", fontsize=16, y=0.95)
             plt.tight_layout(rect=[0, 0.03, 1, 0.95])
-            plt.show()
+            self._save_or_show(fig, year, month, output_file)
             return
 
         # Get the number of days in the specified month
@@ -230,19 +342,23 @@ class ServiceInsightsEngine:
 
         # --- Generate Heatmap Data ---
         try:
-            heatmap_data = df_month.groupby(['day_of_month', 'hour']).size().unstack(fill_value=0)
-            # Ensure all days and hours are present
+            # heatmap_counts is a (days_in_month, 24) slice of the precomputed histogram
             all_days = range(1, days_in_month + 1)
             all_hours = range(24)
-            heatmap_data = heatmap_data.reindex(index=all_days, columns=all_hours, fill_value=0)
 
             # --- Plot Heatmap ---
-            sns.heatmap(heatmap_data,
-                        cmap='YlOrRd', # Use the specified colormap
-                        ax=ax,
-                        linewidths=.5,      # Keep lines between cells
-                        linecolor='lightgray', # Color for the lines
-                        cbar_kws={'label': 'Number of Changes'}) # Label for the color bar
+            # imshow draws the grid as a single image rather than one patch per cell
+            im = ax.imshow(heatmap_counts,
+                           cmap='YlOrRd', # Use the specified colormap
+                           aspect='auto',
+                           interpolation='nearest')
+            fig.colorbar(im, ax=ax, label='Number of Changes')
+            if not HEADLESS:
+                # Light lines between cells for interactive viewing; skipped for faster file output
+                ax.set_xticks(np.arange(-0.5, 24), minor=True)
+                ax.set_yticks(np.arange(-0.5, days_in_month), minor=True)
+                ax.grid(which='minor', color='lightgray', linewidth=.5)
+                ax.tick_params(which='minor', length=0)
 
             # Set title specific to the axes/plot itself (optional, can rely on suptitle)
             # ax.set_title('Activity Frequency: Day of Month vs. Hour') # Can be commented out if suptitle is enough
@@ -250,12 +366,12 @@ class ServiceInsightsEngine:
             ax.set_ylabel('Day of Month')
 
             # --- Explicitly set X-axis ticks and labels ---
-            ax.set_xticks([i + 0.5 for i in all_hours]) # Center ticks in cells
+            ax.set_xticks(list(all_hours))             # Ticks sit on cell centers
             ax.set_xticklabels(all_hours)              # Label with hour numbers
             ax.tick_params(axis='x', rotation=0)       # Keep labels horizontal
 
             # --- Configure Y-axis ---
-            ax.set_yticks([i + 0.5 for i in range(days_in_month)]) # Center ticks in cells
+            ax.set_yticks(list(range(days_in_month)))              # Ticks sit on cell centers
             ax.set_yticklabels(all_days)                           # Label with day numbers
             ax.tick_params(axis='y', rotation=0)                   # Keep labels horizontal
             ax.invert_yaxis() # Invert y-axis (day 1 at the top)
@@ -268,26 +384,70 @@ class ServiceInsightsEngine:
 
         # --- Final Touches ---
         plt.tight_layout(rect=[0, 0.03, 1, 0.95]) # Adjust layout to prevent title overlap
-        plt.show()
-        logger.info(f"Heatmap visualization for {month_name} {year} generated and displayed.")
+        self._save_or_show(fig, year, month, output_file)
+
+    def _save_or_show(self, fig: plt.Figure, year: int, month: int, output_file: Optional[str]) -> None:
+        """
+        Saves the month's figure to a file (always when headless) or shows it interactively.
+
+        Args:
+            fig (plt.Figure): The finished figure.
+            year (int): The year shown in the figure.
+            month (int): The month number (1-12) shown in the figure.
+            output_file (Optional[str]): Target file; headless runs default to 'service_heatmap_<year>_<month>.png'.
+        """
+        month_name = datetime(year, month, 1).strftime('%B')
+        if output_file is None and HEADLESS:
+            output_file = f"service_heatmap_{year}_{month:02d}.png"
+        if output_file:
+            fig.savefig(output_file)
+            plt.close(fig)
+            logger.info(f"Heatmap visualization for {month_name} {year} saved to: {output_file}")
+        else:
+            plt.show()
+            logger.info(f"Heatmap visualization for {month_name} {year} generated and displayed.")
 
 
 # --- Main Execution Block ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a day-of-month vs. hour heatmap of service status changes.")
+    parser.add_argument(
+        "-m", "--month",
+        type=int,
+        nargs='+',
+        choices=range(1, 13),
+        metavar="MONTH",
+        help="Month number(s) (1-12) to visualize. Prompted for when omitted and stdin is a terminal."
+    )
+    parser.add_argument(
+        "-y", "--year",
+        type=int,
+        default=datetime.now().year,
+        help="Year to visualize (default: current year)."
+    )
+    args = parser.parse_args()
+    if args.month is None and not sys.stdin.isatty():
+        parser.error("--month is required when input is not interactive")
+
     logger.info("="*50)
     logger.info("Starting Service Monitoring Insights Engine (Heatmap Only - Select Month)")
     logger.info("="*50)
 
     csv_file_name = 'ServiceStatusChanges.csv'
 
+    # Load and preprocess the CSV in the background while the month is being chosen
+    executor = ThreadPoolExecutor(max_workers=1)
+    engine_future = executor.submit(ServiceInsightsEngine, csv_file_name)
+    executor.shutdown(wait=False)
+
     # --- Get User Input for Month ---
-    selected_month = None
-    while selected_month is None:
+    selected_months = args.month
+    while selected_months is None:
         try:
             month_input = input("Enter the month number (1-12) to visualize: ")
             month_int = int(month_input)
             if 1 <= month_int <= 12:
-                selected_month = month_int
+                selected_months = [month_int]
             else:
                 print("Invalid input. Please enter a number between 1 and 12.")
         except ValueError:
@@ -296,14 +456,13 @@ if __name__ == "__main__":
              logger.error("Input stream closed unexpectedly. Exiting.")
              sys.exit(1)
 
-    # Assume the current year for the visualization
-    current_year = datetime.now().year
-    logger.info(f"User selected month: {selected_month}, Year: {current_year}")
+    selected_year = args.year
+    logger.info(f"Selected month(s): {selected_months}, Year: {selected_year}")
 
 
     try:
         # --- Initialization ---
-        engine = ServiceInsightsEngine(csv_file_name)
+        engine = engine_future.result()
 
         if engine.df is None:
             logger.error("Data loading failed. Exiting.")
@@ -314,9 +473,10 @@ if __name__ == "__main__":
         # engine.analyze_correlations()
 
         # --- Visualization ---
-        logger.info(f"--- Generating Heatmap Visualization for Month {selected_month}/{current_year} ---")
-        # Call the visualization function with the selected month and current year
-        engine.visualize_heatmap_for_month(year=current_year, month=selected_month)
+        # The loaded engine is reused for every requested month
+        for selected_month in selected_months:
+            logger.info(f"--- Generating Heatmap Visualization for Month {selected_month}/{selected_year} ---")
+            engine.visualize_heatmap_for_month(year=selected_year, month=selected_month)
 
         logger.info("="*50)
         logger.info("Insights Engine Finished Successfully")
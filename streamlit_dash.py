@@ -9,6 +9,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from functools import partial
 import numpy as np
 import os
 import sys
@@ -55,17 +56,45 @@ st.title("📊 HULFT01 Performance Monitoring")
 
 # 
 
+CSV_PATH = 'server_alerts1.csv'
+# Trend charts with more points than this are downsampled to TREND_TARGET_POINTS before plotting
+MAX_TREND_POINTS = 5000
+TREND_TARGET_POINTS = 2000
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape of (x, y)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    # First and last points are always kept; the rest are split into n_out - 2 buckets
+    edges = np.append(np.linspace(1, n - 1, n_out - 1).astype(np.intp), n)
+    idx = np.empty(n_out, dtype=np.intp)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        xc = x[hi:edges[i + 2]].mean()
+        yc = y[hi:edges[i + 2]].mean()
+        area = np.abs((x[a] - xc) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (yc - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
 # Load data - modified for better compatibility
-def load_data():
+# Cached across reruns; source_mtime is part of the cache key so edits to the CSV are picked up
+@st.cache_data(show_spinner=False, ttl=300)
+def load_data(source_mtime=None):
     try:
-        csv_path = 'server_alerts1.csv'
+        csv_path = CSV_PATH
         st.write(f"Attempting to load CSV from: {os.path.abspath(csv_path)}")
         
         if not os.path.exists(csv_path):
             st.error(f"CSV file not found at: {os.path.abspath(csv_path)}")
             return pd.DataFrame()
             
-        df = pd.read_csv(csv_path)
+        # Arrow's parser (streamlit already depends on pyarrow) decodes the CSV on multiple threads
+        df = pd.read_csv(csv_path, engine='pyarrow')
         st.write(f"Successfully loaded {len(df)} records")
         
         # Convert timestamp with error handling
@@ -75,17 +104,27 @@ def load_data():
         except Exception as e:
             st.error(f"Error converting timestamps: {str(e)}")
             
-        # Add helpful derived columns
-        if 'cpu_usage' in df.columns:
-            df['is_critical'] = df['cpu_usage'] >= 80
-            
         return df
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         return pd.DataFrame()
 
-# Load data without caching for troubleshooting
-df = load_data()
+# Row positions matching a filter selection are cached (a small int array, not a copy of the rows);
+# _df is not hashed, source_mtime identifies the data instead
+@st.cache_data(show_spinner=False, ttl=300, max_entries=32)
+def filter_positions(_df, source_mtime, start_date, end_date, server, process):
+    mask = ((_df['date'] >= start_date) & (_df['date'] <= end_date)).to_numpy()
+
+    if server != "All Servers":
+        mask = mask & (_df['server_name'] == server).to_numpy()
+
+    if process != "All Processes":
+        mask = mask & (_df['top_process'] == process).to_numpy()
+
+    return np.flatnonzero(mask)
+
+source_mtime = os.path.getmtime(CSV_PATH) if os.path.exists(CSV_PATH) else None
+df = load_data(source_mtime)
 
 if df.empty:
     st.warning("No data available. Please ensure your CSV file exists and contains valid data.")
@@ -125,13 +164,7 @@ except Exception as e:
 
 # Apply filters with error handling
 try:
-    filtered_df = df[(df['date'] >= start_date) & (df['date'] <= end_date)]
-
-    if selected_server != "All Servers":
-        filtered_df = filtered_df[filtered_df['server_name'] == selected_server]
-        
-    if selected_process != "All Processes":
-        filtered_df = filtered_df[filtered_df['top_process'] == selected_process]
+    filtered_df = df.iloc[filter_positions(df, source_mtime, start_date, end_date, selected_server, selected_process)]
 except Exception as e:
     st.error(f"Error applying filters: {str(e)}")
     filtered_df = df.copy()
@@ -173,8 +206,9 @@ with col3:
 
 with col4:
     try:
-        if 'is_critical' in filtered_df.columns:
-            critical_count = filtered_df['is_critical'].sum()
+        if 'cpu_usage' in filtered_df.columns:
+            # Evaluated on the filtered rows only, rather than stored as a column on the full frame
+            critical_count = int(np.count_nonzero(filtered_df['cpu_usage'].to_numpy() >= 80))
             critical_pct = (critical_count / len(filtered_df)) * 100 if len(filtered_df) > 0 else 0
             st.metric(
                 "Critical Alerts", 
@@ -194,14 +228,23 @@ try:
     if len(filtered_df) > 0 and 'cpu_usage' in filtered_df.columns:
         # Sort by time for proper trend display
         trend_df = filtered_df.sort_values('received_time')
-        
-        fig = px.line(
-            trend_df, 
-            x='received_time', 
-            y='cpu_usage',
-            labels={'received_time': 'Time', 'cpu_usage': 'CPU Usage (%)'},
-            template='plotly_white'
-        )
+        trend_x = trend_df['received_time'].to_numpy()
+        trend_y = trend_df['cpu_usage'].to_numpy(dtype=np.float64)
+
+        # Downsample large selections so the browser only renders a representative subset
+        if len(trend_df) > MAX_TREND_POINTS:
+            keep = lttb_indices(trend_x.astype('datetime64[ns]').astype(np.float64), trend_y, TREND_TARGET_POINTS)
+            trend_x, trend_y = trend_x[keep], trend_y[keep]
+
+        # WebGL trace keeps panning/zooming responsive with thousands of points
+        fig = go.Figure(go.Scattergl(
+            x=trend_x,
+            y=trend_y,
+            mode='lines',
+            name='CPU Usage (%)',
+            hovertemplate='%{y:.1f}%<extra></extra>'
+        ))
+        fig.update_layout(template='plotly_white')
         
         # Add threshold line
         if 'threshold' in filtered_df.columns and not filtered_df['threshold'].isnull().all():
@@ -237,7 +280,7 @@ with col1:
     try:
         if len(filtered_df) > 0 and 'top_process' in filtered_df.columns and 'cpu_seconds' in filtered_df.columns:
             # Group by process and calculate average CPU seconds
-            process_df = filtered_df.groupby('top_process')['cpu_seconds'].mean().reset_index()
+            process_df = filtered_df.groupby('top_process', observed=True, sort=False)['cpu_seconds'].mean().reset_index()
             process_df = process_df.sort_values('cpu_seconds', ascending=False).head(10)
             
             fig = px.bar(
@@ -264,32 +307,49 @@ with col2:
         if len(filtered_df) > 0 and 'top_process' in filtered_df.columns:
             process_counts = filtered_df['top_process'].value_counts()
             
-            fig = px.pie(
-                values=process_counts.values,
-                names=process_counts.index,
-                hole=0.4,
-                template='plotly_white'
-            )
+            # Keep the 10 most frequent processes and fold the long tail into "Other"
+            top_counts = process_counts.iloc[:10]
+            other_count = process_counts.iloc[10:].sum()
+            if other_count > 0:
+                top_counts = pd.concat([top_counts, pd.Series({'Other': other_count})])
+            share = top_counts.to_numpy() / len(filtered_df) * 100
             
-            fig.update_layout(height=400)
-            fig.update_traces(textinfo='percent+label')
+            fig = go.Figure(go.Bar(
+                x=top_counts.to_numpy(),
+                y=top_counts.index.astype(str),
+                orientation='h',
+                text=[f"{pct:.1f}%" for pct in share],
+                textposition='auto'
+            ))
+            
+            fig.update_layout(
+                height=400,
+                template='plotly_white',
+                xaxis_title="Alerts",
+                yaxis=dict(autorange='reversed')
+            )
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No process distribution data available.")
     except Exception as e:
-        st.error(f"Error generating pie chart: {str(e)}")
+        st.error(f"Error generating process distribution chart: {str(e)}")
 
 # Time Pattern Analysis
 st.header("Time Pattern Analysis")
 
 try:
     if len(filtered_df) > 0 and 'received_time' in filtered_df.columns and 'cpu_usage' in filtered_df.columns:
-        # Create hour of day column
-        pattern_df = filtered_df.copy()
-        pattern_df['hour'] = pattern_df['received_time'].dt.hour
-        
-        # Group by hour and calculate average CPU
-        hourly_avg = pattern_df.groupby('hour')['cpu_usage'].mean().reset_index()
+        # Average CPU per hour of day with two bincounts over the hour values (no copy of filtered_df)
+        hours = filtered_df['received_time'].dt.hour.to_numpy()
+        cpu = filtered_df['cpu_usage'].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(cpu)
+        hour_sums = np.bincount(hours[valid], weights=cpu[valid], minlength=24)
+        hour_counts = np.bincount(hours[valid], minlength=24)
+        seen = hour_counts > 0
+        hourly_avg = pd.DataFrame({
+            'hour': np.flatnonzero(seen),
+            'cpu_usage': hour_sums[seen] / hour_counts[seen]
+        })
         
         fig = px.bar(
             hourly_avg,
@@ -352,12 +412,13 @@ st.sidebar.header("Export Data")
 
 try:
     if len(filtered_df) > 0:
-        csv = filtered_df.to_csv(index=False)
         server_name = "all_servers" if selected_server == "All Servers" else selected_server
         
+        # Passing a callable defers building the CSV until the button is actually clicked;
+        # partial binds this run's frame so a later rerun cannot swap it out
         st.sidebar.download_button(
             label="Download Filtered Data",
-            data=csv,
+            data=partial(filtered_df.to_csv, index=False),
             file_name=f"server_alerts_{server_name}_{start_date}_{end_date}.csv",
             mime='text/csv',
         )